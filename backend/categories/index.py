@@ -8,15 +8,170 @@ Returns: HTTP response dict с данными категорий
 
 import json
 import os
-from typing import Dict, Any, Optional
+import threading
+import time
+from typing import Dict, Any, Optional, Callable, Tuple
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+# SQL-запросы функции (их планы проверяет db_tests/test_query_plans.py)
+LIST_CATEGORIES_SQL = "SELECT id, name, icon, sort_order FROM categories ORDER BY sort_order ASC"
+LIST_CATEGORY_FACETS_SQL = "SELECT category, product_count, min_price, max_price FROM category_facets ORDER BY category"
+LIST_PRICE_BUCKETS_SQL = "SELECT category, bucket, product_count FROM category_price_buckets ORDER BY category, bucket"
+INSERT_CATEGORY_SQL = "INSERT INTO categories (id, name, icon, sort_order) VALUES (%s, %s, %s, %s) RETURNING id, name, icon, sort_order"
+UPDATE_CATEGORY_SQL = "UPDATE categories SET {fields} WHERE id = %s RETURNING id, name, icon, sort_order"
+DELETE_CATEGORY_SQL = "DELETE FROM categories WHERE id = %s RETURNING id"
+
 def get_db_connection():
     """Создание подключения к БД"""
     dsn = os.environ.get('DATABASE_URL')
     return psycopg2.connect(dsn)
 
+# Коалесцинг одинаковых GET внутри тёплого инстанса: пока выполняется запрос
+# с тем же ключом (только параметры, которые читает загрузчик), остальные ждут его результат.
+# GET_CACHE_TTL (секунды, по умолчанию 0 — выключен) добавляет микрокэш сверху,
+# не больше GET_CACHE_MAX_ENTRIES ответов.
+GET_CACHE_TTL = float(os.environ.get('GET_CACHE_TTL', '0'))
+GET_CACHE_MAX_ENTRIES = int(os.environ.get('GET_CACHE_MAX_ENTRIES', '128'))
+
+_get_lock = threading.Lock()
+_get_generation = 0
+_get_inflight: Dict[Tuple[int, str], Dict[str, Any]] = {}
+_get_cache: Dict[Tuple[int, str], Tuple[float, Dict[str, Any]]] = {}
+
+def invalidate_get_cache() -> None:
+    """Сбросить микрокэш после изменения данных"""
+    global _get_generation
+    with _get_lock:
+        _get_generation += 1
+        _get_cache.clear()
+
+def store_cached(key: Tuple[int, str], response: Dict[str, Any]) -> None:
+    """Положить ответ в микрокэш, выбросив истёкшие записи (вызывается под _get_lock)"""
+    now = time.monotonic()
+    for expired in [k for k, (expires, _) in _get_cache.items() if expires <= now]:
+        del _get_cache[expired]
+    if len(_get_cache) < GET_CACHE_MAX_ENTRIES:
+        _get_cache[key] = (now + GET_CACHE_TTL, response)
+
+def coalesced_get(query: str, loader: Callable[[], Dict[str, Any]], cache: bool = True) -> Dict[str, Any]:
+    """
+    Выполнить loader один раз для всех одновременных запросов с тем же query.
+    cache=False — только коалесцинг, без микрокэша.
+    """
+    with _get_lock:
+        key = (_get_generation, query)
+        cached = _get_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return dict(cached[1])
+
+        call = _get_inflight.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = {'event': threading.Event(), 'response': None, 'error': None}
+            _get_inflight[key] = call
+
+    if not is_leader:
+        call['event'].wait()
+        if call['error'] is not None:
+            raise call['error']
+        return dict(call['response'])
+
+    try:
+        call['response'] = loader()
+    except Exception as e:
+        call['error'] = e
+        raise
+    finally:
+        with _get_lock:
+            _get_inflight.pop(key, None)
+            # Записи после старта запроса меняют поколение — такой результат не кэшируем
+            if cache and call['error'] is None and GET_CACHE_TTL > 0 and key[0] == _get_generation:
+                store_cached(key, call['response'])
+        call['event'].set()
+
+    return dict(call['response'])
+
+def load_categories() -> Dict[str, Any]:
+    """Чтение списка категорий для GET"""
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(LIST_CATEGORIES_SQL)
+        categories = cur.fetchall()
+        
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps([dict(c) for c in categories], default=str)
+        }
+    finally:
+        conn.close()
+
+# Границы ценовых корзин, должны совпадать с price_bucket() в db_migrations
+PRICE_BUCKET_EDGES = [10000, 25000, 50000, 100000, 250000, 500000, 1000000]
+
+def load_facets() -> Dict[str, Any]:
+    """
+    Категории с числом видимых товаров, min/max цены и гистограммой цен.
+    Читает только предрассчитанные таблицы category_facets и category_price_buckets.
+    """
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(LIST_CATEGORIES_SQL)
+        categories = cur.fetchall()
+        cur.execute(LIST_CATEGORY_FACETS_SQL)
+        facets = {f['category']: f for f in cur.fetchall()}
+        cur.execute(LIST_PRICE_BUCKETS_SQL)
+        bucket_rows = cur.fetchall()
+    finally:
+        conn.close()
+    
+    buckets: Dict[str, Dict[int, int]] = {}
+    for row in bucket_rows:
+        buckets.setdefault(row['category'], {})[row['bucket']] = row['product_count']
+    
+    # "Все категории" — сумма по всем категориям, включая товары без категории
+    total_buckets: Dict[int, int] = {}
+    for category_buckets in buckets.values():
+        for bucket, count in category_buckets.items():
+            total_buckets[bucket] = total_buckets.get(bucket, 0) + count
+    min_prices = [f['min_price'] for f in facets.values() if f['min_price'] is not None]
+    max_prices = [f['max_price'] for f in facets.values() if f['max_price'] is not None]
+    total = {
+        'product_count': sum(f['product_count'] for f in facets.values()),
+        'min_price': min(min_prices) if min_prices else None,
+        'max_price': max(max_prices) if max_prices else None,
+    }
+    
+    result = []
+    for category in categories:
+        if category['id'] == 'all':
+            facet = total
+            category_buckets = total_buckets
+        else:
+            facet = facets.get(category['id']) or {'product_count': 0, 'min_price': None, 'max_price': None}
+            category_buckets = buckets.get(category['id'], {})
+        
+        edges = [None] + PRICE_BUCKET_EDGES + [None]
+        result.append({
+            **dict(category),
+            'product_count': facet['product_count'],
+            'min_price': facet['min_price'],
+            'max_price': facet['max_price'],
+            'price_buckets': [
+                {'from': edges[bucket], 'to': edges[bucket + 1], 'count': count}
+                for bucket, count in sorted(category_buckets.items()) if count > 0
+            ]
+        })
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps(result, default=str)
+    }
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -33,25 +188,22 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': ''
         }
     
+    # Получить все категории (с фасетами при ?facets=true)
+    if method == 'GET':
+        params = event.get('queryStringParameters') or {}
+        if params.get('facets') == 'true':
+            # Фасеты меняются при записи товаров, которая не сбрасывает кэш этого модуля
+            return coalesced_get('facets=True', load_facets, cache=False)
+        return coalesced_get('facets=False', load_categories)
+    
     conn = None
     
     try:
         conn = get_db_connection()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
-        # Получить все категории
-        if method == 'GET':
-            cur.execute("SELECT id, name, icon, sort_order FROM categories ORDER BY sort_order ASC")
-            categories = cur.fetchall()
-            
-            return {
-                'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps([dict(c) for c in categories], default=str)
-            }
-        
         # Добавить новую категорию
-        elif method == 'POST':
+        if method == 'POST':
             body_data = json.loads(event.get('body', '{}'))
             
             category_id: str = body_data.get('id', '')
@@ -67,12 +219,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             cur.execute(
-                "INSERT INTO categories (id, name, icon, sort_order) VALUES (%s, %s, %s, %s) RETURNING id, name, icon, sort_order",
+                INSERT_CATEGORY_SQL,
                 (category_id, name, icon, sort_order)
             )
             
             new_category = cur.fetchone()
             conn.commit()
+            invalidate_get_cache()
             
             return {
                 'statusCode': 201,
@@ -117,7 +270,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             values.append(category_id)
-            query = f"UPDATE categories SET {', '.join(updates)} WHERE id = %s RETURNING id, name, icon, sort_order"
+            query = UPDATE_CATEGORY_SQL.format(fields=', '.join(updates))
             
             cur.execute(query, values)
             updated_category = cur.fetchone()
@@ -130,6 +283,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             conn.commit()
+            invalidate_get_cache()
             
             return {
                 'statusCode': 200,
@@ -157,7 +311,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'body': json.dumps({'error': 'Нельзя удалить категорию "Все категории"'})
                 }
             
-            cur.execute("DELETE FROM categories WHERE id = %s RETURNING id", (category_id,))
+            cur.execute(DELETE_CATEGORY_SQL, (category_id,))
             deleted = cur.fetchone()
             
             if not deleted:
@@ -168,6 +322,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             conn.commit()
+            invalidate_get_cache()
             
             return {
                 'statusCode': 200,
@@ -1,32 +1,342 @@
 """
-Business: Compress and optimize image, return as data URL
-Args: event with httpMethod, body (JSON with base64 encoded image)
-Returns: HTTP response with optimized base64 data URL
+Business: Compress and optimize image, upload to S3 and return CDN URL.
+          With "async": true the original is stored and a job is queued;
+          GET ?job_id=... reports the job progress and final URLs.
+Args: event with httpMethod, body (JSON with base64 encoded image), queryStringParameters
+Returns: HTTP response with CDN URL, or job id / job status in async mode
 """
 
 import json
 import base64
 import io
 import os
-from typing import Dict, Any
+import uuid
+from typing import Dict, Any, Optional
 from PIL import Image
 
+MAX_SIZE = 800
+
+# Variants produced by the async worker: name -> max side in pixels.
+# Largest first: each variant is downscaled from the previous one, the original is decoded once.
+VARIANTS = {
+    'full': 800,
+    'thumb': 300,
+}
+
+# Set IMAGE_WORKER_ENABLED=1 where worker.py (or server/app.py) drains the queue.
+# Without a worker the status request encodes the polled job itself: the upload
+# request stays fast, but the encode still runs under the same function timeout.
+WORKER_ENABLED = os.environ.get('IMAGE_WORKER_ENABLED') == '1'
+
+# Pending jobs older than this are processed by the status request of that job
+INLINE_AFTER_SECONDS = int(os.environ.get('IMAGE_JOB_INLINE_AFTER', '30' if WORKER_ENABLED else '0'))
+
+# A 'processing' job not updated for this long was killed mid-encode (e.g. by
+# the function timeout) and may be claimed again, at most MAX_ATTEMPTS times
+STALE_AFTER_SECONDS = int(os.environ.get('IMAGE_JOB_STALE_AFTER', '60'))
+MAX_ATTEMPTS = int(os.environ.get('IMAGE_JOB_MAX_ATTEMPTS', '3'))
+
+# SQL statements of this function (plans are checked by db_tests/test_query_plans.py)
+INSERT_JOB_SQL = "INSERT INTO image_jobs (id, filename, original_key, original_size) VALUES (%s, %s, %s, %s)"
+SELECT_JOB_SQL = """SELECT id, status, progress, filename, original_size, result, error, created_at, updated_at,
+           EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - created_at)::int AS age_seconds
+    FROM image_jobs WHERE id = %s"""
+FAIL_STALE_JOB_SQL = """UPDATE image_jobs SET status = 'failed', error = 'Processing timed out', updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s AND status = 'processing' AND attempts >= %s
+      AND updated_at < CURRENT_TIMESTAMP - make_interval(secs => %s)"""
+FAIL_STALE_JOBS_SQL = """UPDATE image_jobs SET status = 'failed', error = 'Processing timed out', updated_at = CURRENT_TIMESTAMP
+    WHERE status = 'processing' AND attempts >= %s
+      AND updated_at < CURRENT_TIMESTAMP - make_interval(secs => %s)"""
+CLAIM_JOB_SQL = """UPDATE image_jobs SET status = 'processing', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s AND attempts < %s
+      AND (status = 'pending'
+           OR (status = 'processing' AND updated_at < CURRENT_TIMESTAMP - make_interval(secs => %s)))
+    RETURNING id, filename, original_key"""
+CLAIM_STALE_JOB_SQL = """UPDATE image_jobs SET status = 'processing', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE id = (
+        SELECT id FROM image_jobs
+        WHERE status = 'processing' AND attempts < %s
+          AND updated_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+        ORDER BY updated_at LIMIT 1 FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, filename, original_key"""
+CLAIM_PENDING_JOB_SQL = """UPDATE image_jobs SET status = 'processing', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE id = (
+        SELECT id FROM image_jobs WHERE status = 'pending'
+        ORDER BY created_at LIMIT 1 FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, filename, original_key"""
+UPDATE_JOB_PROGRESS_SQL = "UPDATE image_jobs SET progress = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s"
+COMPLETE_JOB_SQL = "UPDATE image_jobs SET status = 'done', progress = 100, result = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s"
+FAIL_JOB_SQL = "UPDATE image_jobs SET status = 'failed', error = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s"
+
+def get_db_connection():
+    """Database connection for the image_jobs queue"""
+    import psycopg2
+    dsn = os.environ.get('DATABASE_URL')
+    return psycopg2.connect(dsn)
+
+def get_s3_client():
+    """S3 client for the project bucket"""
+    import boto3
+    return boto3.client('s3',
+        endpoint_url='https://bucket.poehali.dev',
+        aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
+        aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY']
+    )
+
+def cdn_url(key: str) -> str:
+    return f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{key}"
+
+def decode_image(file_data: bytes) -> Image.Image:
+    """Open the image in a mode that can be saved as JPEG"""
+    img = Image.open(io.BytesIO(file_data))
+
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGB')
+    return img
+
+def encode_image(img: Image.Image, max_size: int) -> bytes:
+    """Downscale img to max_size in place and encode it as JPEG"""
+    if img.width > max_size or img.height > max_size:
+        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=85, optimize=True)
+    return output.getvalue()
+
+def optimize_image(file_data: bytes, max_size: int = MAX_SIZE) -> bytes:
+    """Decode, downscale to max_size and re-encode as JPEG"""
+    return encode_image(decode_image(file_data), max_size)
+
+def enqueue_job(file_data: bytes, filename: str, content_type: str) -> str:
+    """Store the original in S3 and add a pending row to image_jobs"""
+    job_id = str(uuid.uuid4())
+    file_ext = filename.split('.')[-1] if '.' in filename else 'jpg'
+    original_key = f"originals/{job_id}.{file_ext}"
+
+    get_s3_client().put_object(
+        Bucket='files',
+        Key=original_key,
+        Body=file_data,
+        ContentType=content_type
+    )
+
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            INSERT_JOB_SQL,
+            (job_id, filename, original_key, len(file_data))
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    return job_id
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    from psycopg2.extras import RealDictCursor
+
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(
+            SELECT_JOB_SQL,
+            (job_id,)
+        )
+        job = cur.fetchone()
+        return dict(job) if job else None
+    finally:
+        conn.close()
+
+def fail_stale_jobs(job_id: Optional[str] = None) -> None:
+    """Mark stale 'processing' jobs that used up MAX_ATTEMPTS as failed"""
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        if job_id:
+            cur.execute(
+                FAIL_STALE_JOB_SQL,
+                (job_id, MAX_ATTEMPTS, STALE_AFTER_SECONDS)
+            )
+        else:
+            cur.execute(
+                FAIL_STALE_JOBS_SQL,
+                (MAX_ATTEMPTS, STALE_AFTER_SECONDS)
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+def process_job(job_id: Optional[str] = None) -> Optional[str]:
+    """
+    Claim a job (the given one, or the next from the queue), build every
+    variant and upload it. Pending jobs and stale 'processing' jobs with
+    attempts left can be claimed.
+    Returns the processed job id, or None when there was nothing to claim.
+    """
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        if job_id:
+            cur.execute(
+                CLAIM_JOB_SQL,
+                (job_id, MAX_ATTEMPTS, STALE_AFTER_SECONDS)
+            )
+        else:
+            # Stale jobs first, they have been waiting the longest.
+            # SKIP LOCKED lets several workers drain the queue in parallel
+            cur.execute(
+                CLAIM_STALE_JOB_SQL,
+                (MAX_ATTEMPTS, STALE_AFTER_SECONDS)
+            )
+            if cur.rowcount == 0:
+                cur.execute(
+                    CLAIM_PENDING_JOB_SQL
+                )
+        claimed = cur.fetchone()
+        conn.commit()
+
+        if not claimed:
+            return None
+
+        job_id, filename, original_key = claimed
+
+        try:
+            s3 = get_s3_client()
+            file_data = s3.get_object(Bucket='files', Key=original_key)['Body'].read()
+
+            img = decode_image(file_data)
+            variants = {}
+            for index, (variant, max_size) in enumerate(VARIANTS.items(), start=1):
+                compressed_data = encode_image(img, max_size)
+                key = f"products/{job_id}-{variant}.jpg"
+                s3.put_object(
+                    Bucket='files',
+                    Key=key,
+                    Body=compressed_data,
+                    ContentType='image/jpeg'
+                )
+                variants[variant] = {'url': cdn_url(key), 'size': len(compressed_data)}
+
+                cur.execute(
+                    UPDATE_JOB_PROGRESS_SQL,
+                    (index * 100 // len(VARIANTS), job_id)
+                )
+                conn.commit()
+
+            result = {
+                'url': variants['full']['url'],
+                'filename': filename,
+                'size': variants['full']['size'],
+                'original_size': len(file_data),
+                'compression_ratio': round(variants['full']['size'] / len(file_data), 2),
+                'variants': variants
+            }
+            cur.execute(
+                COMPLETE_JOB_SQL,
+                (json.dumps(result), job_id)
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            cur.execute(
+                FAIL_JOB_SQL,
+                (f'{type(e).__name__}: {e}', job_id)
+            )
+            conn.commit()
+
+        return job_id
+    finally:
+        conn.close()
+
+def process_pending_jobs(limit: int = 10) -> int:
+    """Drain up to limit jobs from the queue, returns how many were processed"""
+    fail_stale_jobs()
+    processed = 0
+    while processed < limit and process_job():
+        processed += 1
+    return processed
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
-    
+
     if method == 'OPTIONS':
         return {
             'statusCode': 200,
             'headers': {
                 'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
                 'Access-Control-Allow-Headers': 'Content-Type, content-type',
                 'Access-Control-Max-Age': '86400'
             },
             'isBase64Encoded': False,
             'body': ''
         }
-    
+
+    # Job status polling
+    if method == 'GET':
+        params = event.get('queryStringParameters') or {}
+        job_id = params.get('job_id')
+
+        if not job_id:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'isBase64Encoded': False,
+                'body': json.dumps({'error': 'job_id is required'})
+            }
+
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            job_id = None
+
+        try:
+            job = get_job(job_id) if job_id else None
+
+            if job and job['status'] in ('pending', 'processing'):
+                fail_stale_jobs(job_id)
+                # A fresh 'processing' job is not claimed again, see process_job
+                if job['status'] == 'processing' or job['age_seconds'] >= INLINE_AFTER_SECONDS:
+                    process_job(job_id)
+                job = get_job(job_id)
+
+            if not job:
+                return {
+                    'statusCode': 404,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    },
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'Job not found'})
+                }
+
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'isBase64Encoded': False,
+                'body': json.dumps(job, default=str)
+            }
+        except Exception as e:
+            return {
+                'statusCode': 500,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'isBase64Encoded': False,
+                'body': json.dumps({'error': str(e), 'type': type(e).__name__})
+            }
+
     if method != 'POST':
         return {
             'statusCode': 405,
@@ -37,11 +347,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False,
             'body': json.dumps({'error': 'Method not allowed'})
         }
-    
+
     try:
         body_str = event.get('body', '')
         is_base64_encoded = event.get('isBase64Encoded', False)
-        
+
         if not body_str:
             return {
                 'statusCode': 400,
@@ -52,10 +362,10 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False,
                 'body': json.dumps({'error': 'No data provided'})
             }
-        
+
         if is_base64_encoded:
             body_str = base64.b64decode(body_str).decode('utf-8')
-        
+
         try:
             data = json.loads(body_str)
         except json.JSONDecodeError as e:
@@ -68,11 +378,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False,
                 'body': json.dumps({'error': f'Invalid JSON: {str(e)}', 'body_sample': body_str[:100], 'was_base64': is_base64_encoded})
             }
-        
+
         file_base64 = data.get('file')
         filename = data.get('filename', 'image.jpg')
         content_type = data.get('contentType', 'image/jpeg')
-        
+
         if not file_base64:
             return {
                 'statusCode': 400,
@@ -83,55 +393,45 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False,
                 'body': json.dumps({'error': 'No file data provided', 'data_keys': list(data.keys())})
             }
-        
+
         file_data = base64.b64decode(file_base64)
-        
-        img = Image.open(io.BytesIO(file_data))
-        
-        if img.mode in ('RGBA', 'LA', 'P'):
-            img = img.convert('RGB')
-        
-        max_size = 800
-        if img.width > max_size or img.height > max_size:
-            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-        
-        output = io.BytesIO()
-        img.save(output, format='JPEG', quality=85, optimize=True)
-        compressed_data = output.getvalue()
-        
-        # Upload to S3
-        import boto3
-        import uuid
-        
-        s3 = boto3.client('s3',
-            endpoint_url='https://bucket.poehali.dev',
-            aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-            aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY']
-        )
-        
+
+        # Async mode: keep the original, let the worker do the encoding
+        if data.get('async'):
+            job_id = enqueue_job(file_data, filename, content_type)
+
+            return {
+                'statusCode': 202,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'isBase64Encoded': False,
+                'body': json.dumps({'job_id': job_id, 'status': 'pending'})
+            }
+
+        compressed_data = optimize_image(file_data)
+
         # Generate unique filename
         file_ext = filename.split('.')[-1] if '.' in filename else 'jpg'
         unique_filename = f"products/{uuid.uuid4()}.{file_ext}"
-        
+
         # Upload to S3
-        s3.put_object(
+        get_s3_client().put_object(
             Bucket='files',
             Key=unique_filename,
             Body=compressed_data,
             ContentType='image/jpeg'
         )
-        
-        # Generate CDN URL
-        cdn_url = f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{unique_filename}"
-        
+
         result = {
-            'url': cdn_url,
+            'url': cdn_url(unique_filename),
             'filename': filename,
             'size': len(compressed_data),
             'original_size': len(file_data),
             'compression_ratio': round(len(compressed_data) / len(file_data), 2)
         }
-        
+
         return {
             'statusCode': 200,
             'headers': {
@@ -141,7 +441,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False,
             'body': json.dumps(result)
         }
-        
+
     except Exception as e:
         return {
             'statusCode': 500,
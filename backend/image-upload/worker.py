@@ -0,0 +1,31 @@
+"""
+Business: Background worker for async image jobs
+Usage: python worker.py  (DATABASE_URL and AWS_* must be set)
+Polls the image_jobs table and builds the optimized variants.
+Set IMAGE_WORKER_ENABLED=1 on the image-upload function while the worker runs,
+so status requests leave the encoding to it.
+"""
+
+import os
+import time
+
+from index import process_pending_jobs
+
+POLL_INTERVAL = float(os.environ.get('IMAGE_WORKER_POLL_INTERVAL', '2'))
+
+def main() -> None:
+    print(f"[worker] Started, poll interval {POLL_INTERVAL}s")
+    while True:
+        try:
+            processed = process_pending_jobs()
+        except Exception as e:
+            # Transient DB/S3 errors must not stop the worker: retry after the poll interval
+            print(f"[worker] Error: {type(e).__name__}: {e}")
+            processed = 0
+        if processed:
+            print(f"[worker] Processed jobs: {processed}")
+        else:
+            time.sleep(POLL_INTERVAL)
+
+if __name__ == '__main__':
+    main()
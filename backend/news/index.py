@@ -4,6 +4,19 @@ from typing import Dict, Any
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+# SQL-запросы функции (их планы проверяет db_tests/test_query_plans.py)
+SELECT_NEWS_SQL = "SELECT id, title, description, image_url, content, created_at, updated_at, published FROM news WHERE id = %s"
+LIST_PUBLISHED_NEWS_SQL = "SELECT id, title, description, image_url, created_at, published FROM news WHERE published = true ORDER BY created_at DESC"
+LIST_NEWS_SQL = "SELECT id, title, description, image_url, created_at, published FROM news ORDER BY created_at DESC"
+INSERT_NEWS_SQL = "INSERT INTO news (title, description, image_url, content, published) VALUES (%s, %s, %s, %s, %s) RETURNING id"
+UPDATE_NEWS_SQL = "UPDATE news SET {fields} WHERE id = %s RETURNING id, title, updated_at"
+DELETE_NEWS_SQL = "DELETE FROM news WHERE id = %s"
+
+def get_db_connection():
+    """Создание подключения к БД"""
+    dsn = os.environ.get('DATABASE_URL')
+    return psycopg2.connect(dsn)
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Управление новостями (получение списка, создание, обновление, удаление)
@@ -25,8 +38,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': ''
         }
     
-    dsn = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(dsn)
+    conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
@@ -36,7 +48,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             
             if news_id:
                 cursor.execute(
-                    "SELECT id, title, description, image_url, content, created_at, updated_at, published FROM news WHERE id = %s",
+                    SELECT_NEWS_SQL,
                     (news_id,)
                 )
                 news_item = cursor.fetchone()
@@ -45,11 +57,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 only_published = params.get('published', 'true') == 'true'
                 if only_published:
                     cursor.execute(
-                        "SELECT id, title, description, image_url, created_at, published FROM news WHERE published = true ORDER BY created_at DESC"
+                        LIST_PUBLISHED_NEWS_SQL
                     )
                 else:
                     cursor.execute(
-                        "SELECT id, title, description, image_url, created_at, published FROM news ORDER BY created_at DESC"
+                        LIST_NEWS_SQL
                     )
                 news_list = cursor.fetchall()
                 result = [dict(item) for item in news_list]
@@ -73,7 +85,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             published = body_data.get('published', True)
             
             cursor.execute(
-                "INSERT INTO news (title, description, image_url, content, published) VALUES (%s, %s, %s, %s, %s) RETURNING id",
+                INSERT_NEWS_SQL,
                 (title, description, image_url, content, published)
             )
             new_news = cursor.fetchone()
@@ -115,7 +127,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             update_fields.append('updated_at = CURRENT_TIMESTAMP')
             update_values.append(news_id)
             
-            query = f"UPDATE news SET {', '.join(update_fields)} WHERE id = %s RETURNING id, title, updated_at"
+            query = UPDATE_NEWS_SQL.format(fields=', '.join(update_fields))
             cursor.execute(query, update_values)
             updated_news = cursor.fetchone()
             conn.commit()
@@ -134,7 +146,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             params = event.get('queryStringParameters') or {}
             news_id = params.get('id')
             
-            cursor.execute("DELETE FROM news WHERE id = %s", (news_id,))
+            cursor.execute(DELETE_NEWS_SQL, (news_id,))
             conn.commit()
             
             return {
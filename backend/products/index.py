@@ -5,17 +5,297 @@ Args: event - dict с httpMethod, body, queryStringParameters
 Returns: HTTP response dict с данными товаров
 '''
 
+import csv
+import io
 import json
 import os
-from typing import Dict, Any, Optional
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional, Callable, Tuple, Iterator, List
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+# SQL-запросы функции (их планы проверяет db_tests/test_query_plans.py)
+LIST_PRODUCTS_SQL = "SELECT id, photo_url, main_image, article, name, price, created_at, is_visible, category, sort_order, description FROM products_new ORDER BY COALESCE(sort_order, 999999), created_at DESC"
+SELECT_PRODUCT_SQL = "SELECT id, photo_url, main_image, article, name, price, created_at, is_visible, category, sort_order, description FROM products_new WHERE id = %s"
+FIND_PRODUCT_BY_ARTICLE_SQL = "SELECT id, name FROM products_new WHERE article = %s"
+INSERT_PRODUCT_SQL = "INSERT INTO products_new (photo_url, main_image, article, name, price, category, description, is_visible, sort_order) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id, photo_url, main_image, article, name, price, created_at, is_visible, category, sort_order, description"
+UPDATE_PRODUCT_SQL = "UPDATE products_new SET {fields} WHERE id = %s RETURNING id, photo_url, main_image, article, name, price, created_at, is_visible, category, sort_order, description"
+UPDATE_PRODUCT_VISIBILITY_SQL = "UPDATE products_new SET is_visible = %s WHERE id = %s RETURNING id, photo_url, main_image, article, name, price, created_at, is_visible, category, description"
+DELETE_PRODUCT_SQL = "DELETE FROM products_new WHERE id = %s RETURNING id"
+
 def get_db_connection():
     """Создание подключения к БД"""
     dsn = os.environ.get('DATABASE_URL')
     return psycopg2.connect(dsn)
 
+def get_s3_client():
+    """S3-клиент для бакета проекта"""
+    import boto3
+    return boto3.client('s3',
+        endpoint_url='https://bucket.poehali.dev',
+        aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
+        aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY']
+    )
+
+# Коалесцинг одинаковых GET внутри тёплого инстанса: пока выполняется запрос
+# с тем же ключом (только параметры, которые читает загрузчик), остальные ждут его результат.
+# GET_CACHE_TTL (секунды, по умолчанию 0 — выключен) добавляет микрокэш сверху,
+# не больше GET_CACHE_MAX_ENTRIES ответов.
+GET_CACHE_TTL = float(os.environ.get('GET_CACHE_TTL', '0'))
+GET_CACHE_MAX_ENTRIES = int(os.environ.get('GET_CACHE_MAX_ENTRIES', '128'))
+
+_get_lock = threading.Lock()
+_get_generation = 0
+_get_inflight: Dict[Tuple[int, str], Dict[str, Any]] = {}
+_get_cache: Dict[Tuple[int, str], Tuple[float, Dict[str, Any]]] = {}
+
+def invalidate_get_cache() -> None:
+    """Сбросить микрокэш после изменения данных"""
+    global _get_generation
+    with _get_lock:
+        _get_generation += 1
+        _get_cache.clear()
+
+def store_cached(key: Tuple[int, str], response: Dict[str, Any]) -> None:
+    """Положить ответ в микрокэш, выбросив истёкшие записи (вызывается под _get_lock)"""
+    now = time.monotonic()
+    for expired in [k for k, (expires, _) in _get_cache.items() if expires <= now]:
+        del _get_cache[expired]
+    if len(_get_cache) < GET_CACHE_MAX_ENTRIES:
+        _get_cache[key] = (now + GET_CACHE_TTL, response)
+
+def coalesced_get(query: str, loader: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Выполнить loader один раз для всех одновременных запросов с тем же query"""
+    with _get_lock:
+        key = (_get_generation, query)
+        cached = _get_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return dict(cached[1])
+
+        call = _get_inflight.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = {'event': threading.Event(), 'response': None, 'error': None}
+            _get_inflight[key] = call
+
+    if not is_leader:
+        call['event'].wait()
+        if call['error'] is not None:
+            raise call['error']
+        return dict(call['response'])
+
+    try:
+        call['response'] = loader()
+    except Exception as e:
+        call['error'] = e
+        raise
+    finally:
+        with _get_lock:
+            _get_inflight.pop(key, None)
+            # Записи после старта запроса меняют поколение — такой результат не кэшируем
+            if call['error'] is None and GET_CACHE_TTL > 0 and key[0] == _get_generation:
+                store_cached(key, call['response'])
+        call['event'].set()
+
+    return dict(call['response'])
+
+def load_products(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Чтение товара по id или всего списка для GET"""
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        product_id = params.get('id')
+        
+        if product_id:
+            cur.execute(
+                SELECT_PRODUCT_SQL,
+                (product_id,)
+            )
+            product = cur.fetchone()
+            
+            if not product:
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Товар не найден'})
+                }
+            
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps(dict(product), default=str)
+            }
+        
+        cur.execute(LIST_PRODUCTS_SQL)
+        products = cur.fetchall()
+        
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps([dict(p) for p in products], default=str)
+        }
+    finally:
+        conn.close()
+
+# Экспорт каталога: колонки совпадают с тем, что читает ExcelImport.tsx
+EXPORT_COLUMNS: List[Tuple[str, str]] = [
+    ('photo_url', 'Фото (URL)'),
+    ('article', 'Артикул'),
+    ('name', 'Наименование'),
+    ('price', 'Цена'),
+    ('category', 'Категория'),
+    ('description', 'Описание'),
+    ('main_image', 'Главное фото'),
+    ('is_visible', 'Видимость'),
+    ('sort_order', 'Порядок'),
+]
+
+EXPORT_PRODUCTS_SQL = f"SELECT {', '.join(c for c, _ in EXPORT_COLUMNS)} FROM products_new ORDER BY id"
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+EXPORT_BATCH_SIZE = 1000
+# Минимальный размер части multipart-загрузки в S3
+EXPORT_PART_SIZE = 5 * 1024 * 1024
+
+class MultipartUpload:
+    """Потоковая загрузка в S3 частями фиксированного размера"""
+
+    def __init__(self, s3: Any, key: str, content_type: str):
+        self.s3 = s3
+        self.key = key
+        self.upload_id = s3.create_multipart_upload(Bucket='files', Key=key, ContentType=content_type)['UploadId']
+        self.parts: List[Dict[str, Any]] = []
+        self.buffer = bytearray()
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self.buffer += data
+        self.size += len(data)
+        if len(self.buffer) >= EXPORT_PART_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        part_number = len(self.parts) + 1
+        response = self.s3.upload_part(
+            Bucket='files', Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=bytes(self.buffer)
+        )
+        self.parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+        self.buffer = bytearray()
+
+    def complete(self) -> None:
+        if self.buffer or not self.parts:
+            self._flush()
+        self.s3.complete_multipart_upload(
+            Bucket='files', Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+
+    def abort(self) -> None:
+        self.s3.abort_multipart_upload(Bucket='files', Key=self.key, UploadId=self.upload_id)
+
+def iter_product_batches(conn: Any) -> Iterator[List[Tuple]]:
+    """Чтение products_new серверным курсором пачками по EXPORT_BATCH_SIZE"""
+    cur = conn.cursor(name='products_export')
+    cur.itersize = EXPORT_BATCH_SIZE
+    try:
+        cur.execute(EXPORT_PRODUCTS_SQL)
+        while True:
+            rows = cur.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+def export_value(column: str, value: Any) -> Any:
+    if value is None:
+        return ''
+    if column == 'price':
+        return float(value)
+    if column == 'is_visible':
+        # 1/0 вместо True/False, ExcelImport.tsx читает оба варианта
+        return 1 if value else 0
+    return value
+
+def export_products(export_format: str) -> Dict[str, Any]:
+    """Выгрузить каталог в S3 и вернуть ссылку; память не зависит от размера каталога"""
+    key = f"exports/products-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.{export_format}"
+    # Соединение открываем до начала multipart-загрузки, чтобы при ошибке подключения
+    # в бакете не оставалась незавершённая загрузка
+    conn = get_db_connection()
+    upload: Optional[MultipartUpload] = None
+    rows_count = 0
+    
+    try:
+        headers = [title for _, title in EXPORT_COLUMNS]
+        columns = [column for column, _ in EXPORT_COLUMNS]
+        upload = MultipartUpload(get_s3_client(), key, EXPORT_FORMATS[export_format])
+        
+        if export_format == 'xlsx':
+            from openpyxl import Workbook
+            
+            # write_only сбрасывает строки во временный файл, а не держит их в памяти
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet('Товары')
+            sheet.append(headers)
+            for rows in iter_product_batches(conn):
+                for row in rows:
+                    sheet.append([export_value(c, v) for c, v in zip(columns, row)])
+                rows_count += len(rows)
+            
+            with tempfile.TemporaryFile() as tmp:
+                workbook.save(tmp)
+                tmp.seek(0)
+                while True:
+                    chunk = tmp.read(EXPORT_PART_SIZE)
+                    if not chunk:
+                        break
+                    upload.write(chunk)
+        else:
+            if export_format == 'csv':
+                # BOM, чтобы Excel открыл кириллицу в UTF-8
+                upload.write('\ufeff'.encode('utf-8'))
+                out = io.StringIO()
+                csv.writer(out).writerow(headers)
+                upload.write(out.getvalue().encode('utf-8'))
+            
+            for rows in iter_product_batches(conn):
+                out = io.StringIO()
+                if export_format == 'csv':
+                    writer = csv.writer(out)
+                    for row in rows:
+                        writer.writerow([export_value(c, v) for c, v in zip(columns, row)])
+                else:
+                    for row in rows:
+                        record = {title: export_value(c, v) for (c, title), v in zip(EXPORT_COLUMNS, row)}
+                        out.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                upload.write(out.getvalue().encode('utf-8'))
+                rows_count += len(rows)
+        
+        upload.complete()
+    except Exception:
+        if upload:
+            upload.abort()
+        raise
+    finally:
+        conn.close()
+    
+    return {
+        'url': f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{key}",
+        'format': export_format,
+        'rows': rows_count,
+        'size': upload.size
+    }
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -32,48 +312,37 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': ''
         }
     
+    # Экспорт каталога (CSV, JSONL, XLSX)
+    params = event.get('queryStringParameters') or {}
+    if method == 'GET' and params.get('export'):
+        export_format = params['export']
+        
+        if export_format not in EXPORT_FORMATS:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': f"Формат экспорта: {', '.join(EXPORT_FORMATS)}"}, ensure_ascii=False)
+            }
+        
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps(export_products(export_format))
+        }
+    
+    # Получить все товары
+    if method == 'GET':
+        product_id = params.get('id') or ''
+        return coalesced_get(f'id={product_id}', lambda: load_products(params))
+    
     conn = None
     
     try:
         conn = get_db_connection()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
-        # Получить все товары
-        if method == 'GET':
-            params = event.get('queryStringParameters') or {}
-            product_id = params.get('id')
-            
-            if product_id:
-                cur.execute(
-                    "SELECT id, photo_url, main_image, article, name, price, created_at, is_visible, category, sort_order, description FROM products_new WHERE id = %s",
-                    (product_id,)
-                )
-                product = cur.fetchone()
-                
-                if not product:
-                    return {
-                        'statusCode': 404,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'Товар не найден'})
-                    }
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps(dict(product), default=str)
-                }
-            else:
-                cur.execute("SELECT id, photo_url, main_image, article, name, price, created_at, is_visible, category, sort_order, description FROM products_new ORDER BY COALESCE(sort_order, 999999), created_at DESC")
-                products = cur.fetchall()
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps([dict(p) for p in products], default=str)
-                }
-        
         # Добавить новый товар
-        elif method == 'POST':
+        if method == 'POST':
             body_data = json.loads(event.get('body', '{}'))
             
             # Логируем входные данные
@@ -86,6 +355,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             price: float = body_data.get('price', 0)
             category: Optional[str] = body_data.get('category', 'all')
             description: Optional[str] = body_data.get('description')
+            is_visible: bool = body_data.get('is_visible', True)
+            sort_order: int = body_data.get('sort_order', 0)
             
             if not article or not name or price <= 0:
                 return {
@@ -95,7 +366,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             # Проверяем уникальность артикула
-            cur.execute("SELECT id, name FROM products_new WHERE article = %s", (article,))
+            cur.execute(FIND_PRODUCT_BY_ARTICLE_SQL, (article,))
             existing = cur.fetchone()
             
             if existing:
@@ -111,12 +382,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             print(f"[POST] Вставка товара: article={article}, name={name}, price={price}, category={category}")
             
             cur.execute(
-                "INSERT INTO products_new (photo_url, main_image, article, name, price, category, description) VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id, photo_url, main_image, article, name, price, created_at, is_visible, category, description",
-                (photo_url, main_image, article, name, price, category, description)
+                INSERT_PRODUCT_SQL,
+                (photo_url, main_image, article, name, price, category, description, is_visible, sort_order)
             )
             
             new_product = cur.fetchone()
             conn.commit()
+            invalidate_get_cache()
             
             print(f"[POST] Товар успешно создан: id={new_product['id']}")
             
@@ -183,7 +455,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             values.append(product_id)
-            query = f"UPDATE products_new SET {', '.join(updates)} WHERE id = %s RETURNING id, photo_url, main_image, article, name, price, created_at, is_visible, category, sort_order, description"
+            query = UPDATE_PRODUCT_SQL.format(fields=', '.join(updates))
             
             cur.execute(query, values)
             updated_product = cur.fetchone()
@@ -196,6 +468,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             conn.commit()
+            invalidate_get_cache()
             
             return {
                 'statusCode': 200,
@@ -217,7 +490,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             cur.execute(
-                "UPDATE products_new SET is_visible = %s WHERE id = %s RETURNING id, photo_url, main_image, article, name, price, created_at, is_visible, category, description",
+                UPDATE_PRODUCT_VISIBILITY_SQL,
                 (is_visible, product_id)
             )
             
@@ -231,6 +504,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             conn.commit()
+            invalidate_get_cache()
             
             return {
                 'statusCode': 200,
@@ -250,7 +524,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'body': json.dumps({'error': 'Требуется id товара'})
                 }
             
-            cur.execute("DELETE FROM products_new WHERE id = %s RETURNING id", (product_id,))
+            cur.execute(DELETE_PRODUCT_SQL, (product_id,))
             deleted = cur.fetchone()
             
             if not deleted:
@@ -261,6 +535,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             conn.commit()
+            invalidate_get_cache()
             
             return {
                 'statusCode': 200,
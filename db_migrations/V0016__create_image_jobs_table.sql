@@ -0,0 +1,16 @@
+-- Очередь асинхронной обработки изображений
+CREATE TABLE IF NOT EXISTS image_jobs (
+    id UUID PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    progress INTEGER NOT NULL DEFAULT 0,
+    filename VARCHAR(255),
+    original_key TEXT NOT NULL,
+    original_size INTEGER,
+    result JSONB,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_image_jobs_pending ON image_jobs(created_at) WHERE status = 'pending';
@@ -0,0 +1,8 @@
+-- idx_products_new_article дублирует индекс ограничения UNIQUE(article)
+DROP INDEX IF EXISTS idx_products_new_article;
+
+-- Индекс под сортировку списка товаров: ORDER BY COALESCE(sort_order, 999999), created_at DESC
+CREATE INDEX IF NOT EXISTS idx_products_new_list_order ON products_new ((COALESCE(sort_order, 999999)), created_at DESC);
+
+-- Индекс под сортировку списка категорий
+CREATE INDEX IF NOT EXISTS idx_categories_sort_order ON categories(sort_order);
@@ -0,0 +1,102 @@
+-- Предрассчитанные фасеты каталога: число видимых товаров, min/max цены
+-- и гистограмма цен по категориям. Поддерживаются триггером на products_new,
+-- поэтому чтение фасетов — O(категорий), а не O(товаров).
+-- Товары без категории хранятся под ключом ''.
+
+CREATE TABLE IF NOT EXISTS category_facets (
+    category VARCHAR(100) PRIMARY KEY,
+    product_count INTEGER NOT NULL DEFAULT 0,
+    min_price DECIMAL(12, 2),
+    max_price DECIMAL(12, 2)
+);
+
+CREATE TABLE IF NOT EXISTS category_price_buckets (
+    category VARCHAR(100) NOT NULL,
+    bucket INTEGER NOT NULL,
+    product_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (category, bucket)
+);
+
+-- Для пересчёта min/max одной категории без сканирования таблицы
+CREATE INDEX IF NOT EXISTS idx_products_new_facets ON products_new ((COALESCE(category, '')), price) WHERE is_visible;
+
+-- Границы корзин должны совпадать с PRICE_BUCKET_EDGES в backend/categories/index.py
+CREATE OR REPLACE FUNCTION price_bucket(p_price DECIMAL) RETURNS INTEGER AS $$
+    SELECT width_bucket(p_price, ARRAY[10000, 25000, 50000, 100000, 250000, 500000, 1000000]::DECIMAL[]);
+$$ LANGUAGE SQL IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION category_facets_apply(p_category VARCHAR, p_price DECIMAL, p_delta INTEGER) RETURNS void AS $$
+BEGIN
+    INSERT INTO category_price_buckets (category, bucket, product_count)
+    VALUES (p_category, price_bucket(p_price), p_delta)
+    ON CONFLICT (category, bucket) DO UPDATE
+    SET product_count = category_price_buckets.product_count + EXCLUDED.product_count;
+
+    -- Сначала блокируем строку категории, затем отдельным запросом (со свежим снимком)
+    -- пересчитываем min/max по индексу idx_products_new_facets
+    INSERT INTO category_facets (category, product_count)
+    VALUES (p_category, p_delta)
+    ON CONFLICT (category) DO UPDATE
+    SET product_count = category_facets.product_count + EXCLUDED.product_count;
+
+    UPDATE category_facets
+    SET (min_price, max_price) = (
+        SELECT min(price), max(price)
+        FROM products_new
+        WHERE COALESCE(category, '') = p_category AND is_visible
+    )
+    WHERE category = p_category;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION products_new_facets_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND OLD.is_visible = NEW.is_visible
+       AND OLD.price = NEW.price
+       AND COALESCE(OLD.category, '') = COALESCE(NEW.category, '') THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_visible THEN
+        PERFORM category_facets_apply(COALESCE(OLD.category, ''), OLD.price, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_visible THEN
+        PERFORM category_facets_apply(COALESCE(NEW.category, ''), NEW.price, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Начальное заполнение и триггер — одним оператором DO, то есть в одной транзакции,
+-- даже если миграция выполняется без транзакции. Блокировка не даёт записать товар
+-- между заполнением и созданием триггера: такой товар не попал бы в фасеты.
+DO $$
+BEGIN
+    LOCK TABLE products_new IN SHARE ROW EXCLUSIVE MODE;
+
+    INSERT INTO category_facets (category, product_count, min_price, max_price)
+    SELECT COALESCE(category, ''), count(*), min(price), max(price)
+    FROM products_new
+    WHERE is_visible
+    GROUP BY COALESCE(category, '')
+    ON CONFLICT (category) DO UPDATE
+    SET product_count = EXCLUDED.product_count,
+        min_price = EXCLUDED.min_price,
+        max_price = EXCLUDED.max_price;
+
+    INSERT INTO category_price_buckets (category, bucket, product_count)
+    SELECT COALESCE(category, ''), price_bucket(price), count(*)
+    FROM products_new
+    WHERE is_visible
+    GROUP BY COALESCE(category, ''), price_bucket(price)
+    ON CONFLICT (category, bucket) DO UPDATE
+    SET product_count = EXCLUDED.product_count;
+
+    CREATE TRIGGER trg_products_new_facets
+    AFTER INSERT OR UPDATE OR DELETE ON products_new
+    FOR EACH ROW EXECUTE FUNCTION products_new_facets_trigger();
+END;
+$$;
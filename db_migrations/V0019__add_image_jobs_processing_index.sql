@@ -0,0 +1,2 @@
+-- Поиск зависших задач (status = 'processing' с давним updated_at) для повторной обработки
+CREATE INDEX IF NOT EXISTS idx_image_jobs_processing ON image_jobs(updated_at) WHERE status = 'processing';
@@ -0,0 +1,86 @@
+'''
+Фикстуры для проверки планов запросов на синтетических данных.
+TEST_DATABASE_URL должен указывать на отдельную тестовую БД:
+схема проекта в ней пересоздаётся при каждом запуске.
+'''
+
+import os
+from pathlib import Path
+
+import pytest
+
+SCHEMA = 't_p58302981_antique_furniture_st'
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / 'db_migrations'
+
+PRODUCTS_COUNT = int(os.environ.get('QUERY_PLAN_PRODUCTS', '100000'))
+NEWS_COUNT = int(os.environ.get('QUERY_PLAN_NEWS', '20000'))
+IMAGE_JOBS_COUNT = int(os.environ.get('QUERY_PLAN_IMAGE_JOBS', '50000'))
+
+SEED_SQL = '''
+INSERT INTO products_new (photo_url, article, name, price, category, description, is_visible, sort_order, created_at)
+SELECT
+    'https://archive8.ru/images/A' || g || '.jpg',
+    'A' || g,
+    'Товар ' || g,
+    1000 + (g * 7919) %% 500000,
+    (ARRAY['sets', 'storage', 'mirrors', 'tables', 'all'])[1 + g %% 5],
+    repeat('Описание антикварного предмета. ', 10),
+    g %% 10 <> 0,
+    CASE WHEN g %% 50 = 0 THEN g %% 100 ELSE 0 END,
+    CURRENT_TIMESTAMP - g * INTERVAL '1 minute'
+FROM generate_series(1, %(products)s) AS g;
+
+INSERT INTO news (title, description, image_url, content, published, created_at)
+SELECT
+    'Новость ' || g,
+    'Краткое описание',
+    '',
+    repeat('Текст новости. ', 50),
+    g %% 20 <> 0,
+    CURRENT_TIMESTAMP - g * INTERVAL '1 hour'
+FROM generate_series(1, %(news)s) AS g;
+
+INSERT INTO image_jobs (id, status, progress, filename, original_key, original_size, attempts, created_at, updated_at)
+SELECT
+    md5(g::text)::uuid,
+    CASE WHEN g %% 5000 = 0 THEN 'processing' WHEN g %% 1000 = 0 THEN 'pending' ELSE 'done' END,
+    CASE WHEN g %% 1000 = 0 THEN 0 ELSE 100 END,
+    'image' || g || '.jpg',
+    'originals/' || g || '.jpg',
+    500000,
+    CASE WHEN g %% 1000 = 0 THEN g %% 3 ELSE 1 END,
+    CURRENT_TIMESTAMP - g * INTERVAL '1 second',
+    CURRENT_TIMESTAMP - g * INTERVAL '1 second'
+FROM generate_series(1, %(image_jobs)s) AS g;
+'''
+
+@pytest.fixture(scope='session')
+def db():
+    '''Соединение с БД, в которой применены все миграции и загружены синтетические данные'''
+    dsn = os.environ.get('TEST_DATABASE_URL')
+    if not dsn:
+        pytest.skip('TEST_DATABASE_URL не задан')
+
+    import psycopg2
+
+    conn = psycopg2.connect(dsn)
+    cur = conn.cursor()
+
+    cur.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+    cur.execute(f'CREATE SCHEMA {SCHEMA}')
+    cur.execute(f'SET search_path TO {SCHEMA}')
+
+    for migration in sorted(MIGRATIONS_DIR.glob('V*.sql')):
+        cur.execute(migration.read_text(encoding='utf-8'))
+
+    cur.execute(SEED_SQL, {'products': PRODUCTS_COUNT, 'news': NEWS_COUNT, 'image_jobs': IMAGE_JOBS_COUNT})
+    conn.commit()
+
+    conn.autocommit = True
+    cur.execute('VACUUM ANALYZE')
+    conn.autocommit = False
+
+    yield conn
+
+    conn.rollback()
+    conn.close()
@@ -0,0 +1,329 @@
+'''
+Регрессионные тесты планов для всех SQL-запросов функций из backend/.
+Каждый запрос выполняется через EXPLAIN (ANALYZE, BUFFERS) с выключенными
+enable_seqscan и enable_sort: если в плане всё равно остаётся Seq Scan или Sort,
+значит, подходящего индекса нет. Заодно проверяется бюджет буферов: в отличие от
+времени выполнения, число буферов не зависит от нагрузки на машину.
+Тексты запросов берутся из констант *_SQL обработчиков, а не копируются сюда.
+'''
+
+import importlib.util
+import re
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, List
+
+import pytest
+
+from conftest import PRODUCTS_COUNT, NEWS_COUNT
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / 'backend'
+FUNCTIONS = ['products', 'categories', 'news', 'image-upload']
+
+FORBIDDEN_NODES = {'Seq Scan', 'Sort', 'Incremental Sort'}
+
+def load_function(name: str) -> ModuleType:
+    '''Импорт backend/<name>/index.py под уникальным именем модуля (как в server/app.py)'''
+    path = BACKEND_DIR / name / 'index.py'
+    spec = importlib.util.spec_from_file_location(f"query_plans_{name.replace('-', '_')}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+HANDLERS: Dict[str, ModuleType] = {name: load_function(name) for name in FUNCTIONS}
+
+# Пересчёт min/max в триггерной функции category_facets_apply (V0018), p_category -> %s
+TRIGGER_MIN_MAX_SQL = "SELECT min(price), max(price) FROM products_new WHERE COALESCE(category, '') = %s AND is_visible"
+
+# Существующие задачи из синтетических данных conftest.py: md5('1000') - pending, md5('5000') - processing
+PENDING_JOB_ID = 'a9b7ba70-783b-617e-9998-dc4dd82eb3c5'
+PROCESSING_JOB_ID = 'a35fe7f7-fe82-17b4-369a-0af4244d1fca'
+
+image_upload = HANDLERS['image-upload']
+
+# name, function, constant (или sql), fields для шаблонов UPDATE ... SET {fields}, params, max_buffers.
+# Бюджеты - замеры на PostgreSQL 16 с запасом ~50%, для полных выборок - пропорционально объёму данных
+QUERIES: List[Dict[str, Any]] = [
+    # products
+    {
+        'name': 'products: список',
+        'function': 'products',
+        'constant': 'LIST_PRODUCTS_SQL',
+        'params': (),
+        'max_buffers': PRODUCTS_COUNT // 6,
+    },
+    {
+        'name': 'products: товар по id',
+        'function': 'products',
+        'constant': 'SELECT_PRODUCT_SQL',
+        'params': (500,),
+        'max_buffers': 8,
+    },
+    {
+        'name': 'products: проверка артикула',
+        'function': 'products',
+        'constant': 'FIND_PRODUCT_BY_ARTICLE_SQL',
+        'params': ('A500',),
+        'max_buffers': 8,
+    },
+    {
+        'name': 'products: создание',
+        'function': 'products',
+        'constant': 'INSERT_PRODUCT_SQL',
+        'params': ('', None, 'NEW-1', 'Новый товар', 1000, 'tables', None, True, 0),
+        'max_buffers': 48,
+    },
+    {
+        'name': 'products: обновление',
+        'function': 'products',
+        'constant': 'UPDATE_PRODUCT_SQL',
+        'fields': 'photo_url = %s, main_image = %s, article = %s, name = %s, price = %s, category = %s, sort_order = %s, description = %s',
+        'params': ('', None, 'A500-1', 'Обновлённый товар', 2000, 'mirrors', 1, None, 500),
+        'max_buffers': 32,
+    },
+    {
+        'name': 'products: видимость',
+        'function': 'products',
+        'constant': 'UPDATE_PRODUCT_VISIBILITY_SQL',
+        'params': (False, 500),
+        'max_buffers': 32,
+    },
+    {
+        'name': 'products: удаление',
+        'function': 'products',
+        'constant': 'DELETE_PRODUCT_SQL',
+        'params': (500,),
+        'max_buffers': 16,
+    },
+    {
+        'name': 'products: экспорт',
+        'function': 'products',
+        'constant': 'EXPORT_PRODUCTS_SQL',
+        'params': (),
+        'max_buffers': PRODUCTS_COUNT // 6,
+    },
+    # categories
+    {
+        'name': 'categories: список',
+        'function': 'categories',
+        'constant': 'LIST_CATEGORIES_SQL',
+        'params': (),
+        'max_buffers': 8,
+    },
+    {
+        'name': 'categories: создание',
+        'function': 'categories',
+        'constant': 'INSERT_CATEGORY_SQL',
+        'params': ('chairs', 'Стулья', 'Armchair', 5),
+        'max_buffers': 16,
+    },
+    {
+        'name': 'categories: обновление',
+        'function': 'categories',
+        'constant': 'UPDATE_CATEGORY_SQL',
+        'fields': 'name = %s, icon = %s, sort_order = %s',
+        'params': ('Столы', 'Table', 4, 'tables'),
+        'max_buffers': 8,
+    },
+    {
+        'name': 'categories: удаление',
+        'function': 'categories',
+        'constant': 'DELETE_CATEGORY_SQL',
+        'params': ('mirrors',),
+        'max_buffers': 8,
+    },
+    {
+        'name': 'categories: фасеты',
+        'function': 'categories',
+        'constant': 'LIST_CATEGORY_FACETS_SQL',
+        'params': (),
+        'max_buffers': 16,
+    },
+    {
+        'name': 'categories: ценовые корзины',
+        'function': 'categories',
+        'constant': 'LIST_PRICE_BUCKETS_SQL',
+        'params': (),
+        'max_buffers': 64,
+    },
+    {
+        'name': 'categories: min/max цены категории',
+        'sql': TRIGGER_MIN_MAX_SQL,
+        'params': ('tables',),
+        'max_buffers': 16,
+    },
+    # news
+    {
+        'name': 'news: новость по id',
+        'function': 'news',
+        'constant': 'SELECT_NEWS_SQL',
+        'params': (500,),
+        'max_buffers': 8,
+    },
+    {
+        'name': 'news: опубликованные',
+        'function': 'news',
+        'constant': 'LIST_PUBLISHED_NEWS_SQL',
+        'params': (),
+        'max_buffers': NEWS_COUNT // 4,
+    },
+    {
+        'name': 'news: все',
+        'function': 'news',
+        'constant': 'LIST_NEWS_SQL',
+        'params': (),
+        'max_buffers': NEWS_COUNT // 4,
+    },
+    {
+        'name': 'news: создание',
+        'function': 'news',
+        'constant': 'INSERT_NEWS_SQL',
+        'params': ('Новость', '', '', 'Текст', True),
+        'max_buffers': 32,
+    },
+    {
+        'name': 'news: обновление',
+        'function': 'news',
+        'constant': 'UPDATE_NEWS_SQL',
+        'fields': 'title = %s, description = %s, image_url = %s, content = %s, published = %s, updated_at = CURRENT_TIMESTAMP',
+        'params': ('Новость', '', '', 'Текст', False, 500),
+        'max_buffers': 16,
+    },
+    {
+        'name': 'news: удаление',
+        'function': 'news',
+        'constant': 'DELETE_NEWS_SQL',
+        'params': (500,),
+        'max_buffers': 8,
+    },
+    # image-upload
+    {
+        'name': 'image-upload: постановка задачи',
+        'function': 'image-upload',
+        'constant': 'INSERT_JOB_SQL',
+        'params': ('00000000-0000-0000-0000-000000000001', 'image.jpg', 'originals/new.jpg', 1000),
+        'max_buffers': 48,
+    },
+    {
+        'name': 'image-upload: статус задачи',
+        'function': 'image-upload',
+        'constant': 'SELECT_JOB_SQL',
+        'params': (PENDING_JOB_ID,),
+        'max_buffers': 8,
+    },
+    {
+        'name': 'image-upload: сброс зависшей задачи',
+        'function': 'image-upload',
+        'constant': 'FAIL_STALE_JOB_SQL',
+        'params': (PROCESSING_JOB_ID, image_upload.MAX_ATTEMPTS, image_upload.STALE_AFTER_SECONDS),
+        'max_buffers': 8,
+    },
+    {
+        'name': 'image-upload: сброс зависших задач',
+        'function': 'image-upload',
+        'constant': 'FAIL_STALE_JOBS_SQL',
+        'params': (image_upload.MAX_ATTEMPTS, image_upload.STALE_AFTER_SECONDS),
+        'max_buffers': 24,
+    },
+    {
+        'name': 'image-upload: захват задачи по id',
+        'function': 'image-upload',
+        'constant': 'CLAIM_JOB_SQL',
+        'params': (PENDING_JOB_ID, image_upload.MAX_ATTEMPTS, image_upload.STALE_AFTER_SECONDS),
+        'max_buffers': 24,
+    },
+    {
+        'name': 'image-upload: захват зависшей задачи',
+        'function': 'image-upload',
+        'constant': 'CLAIM_STALE_JOB_SQL',
+        'params': (image_upload.MAX_ATTEMPTS, image_upload.STALE_AFTER_SECONDS),
+        'max_buffers': 24,
+    },
+    {
+        'name': 'image-upload: захват задачи',
+        'function': 'image-upload',
+        'constant': 'CLAIM_PENDING_JOB_SQL',
+        'params': (),
+        'max_buffers': 24,
+    },
+    {
+        'name': 'image-upload: прогресс задачи',
+        'function': 'image-upload',
+        'constant': 'UPDATE_JOB_PROGRESS_SQL',
+        'params': (50, PROCESSING_JOB_ID),
+        'max_buffers': 24,
+    },
+    {
+        'name': 'image-upload: задача выполнена',
+        'function': 'image-upload',
+        'constant': 'COMPLETE_JOB_SQL',
+        'params': ('{"original": {"url": "https://cdn/x.jpg"}}', PROCESSING_JOB_ID),
+        'max_buffers': 24,
+    },
+    {
+        'name': 'image-upload: ошибка задачи',
+        'function': 'image-upload',
+        'constant': 'FAIL_JOB_SQL',
+        'params': ('Cannot identify image file', PROCESSING_JOB_ID),
+        'max_buffers': 24,
+    },
+]
+
+def query_sql(query: Dict[str, Any]) -> str:
+    '''Текст запроса: константа обработчика, для шаблонов UPDATE - с подставленными полями'''
+    if 'sql' in query:
+        return query['sql']
+    sql = getattr(HANDLERS[query['function']], query['constant'])
+    if 'fields' in query:
+        sql = sql.format(fields=query['fields'])
+    return sql
+
+def normalize(sql: str) -> str:
+    return re.sub(r'\s+', ' ', sql).strip()
+
+def plan_nodes(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    '''Все узлы плана, включая вложенные и InitPlan'''
+    nodes = [plan]
+    for child in plan.get('Plans', []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+def explain(conn, sql: str, params: tuple) -> Dict[str, Any]:
+    '''EXPLAIN (ANALYZE, BUFFERS) в транзакции, которая затем откатывается'''
+    cur = conn.cursor()
+    try:
+        cur.execute('SET LOCAL enable_seqscan = off')
+        cur.execute('SET LOCAL enable_sort = off')
+        cur.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sql, params)
+        return cur.fetchone()[0][0]
+    finally:
+        conn.rollback()
+
+@pytest.mark.parametrize('name', FUNCTIONS)
+def test_all_handler_queries_covered(name):
+    '''Каждая константа *_SQL обработчика должна проверяться в QUERIES'''
+    constants = {attr for attr, value in vars(HANDLERS[name]).items() if attr.endswith('_SQL') and isinstance(value, str)}
+    covered = {query['constant'] for query in QUERIES if query.get('function') == name}
+    assert constants - covered == set(), f"{name}: нет в QUERIES"
+    assert covered - constants == set(), f"{name}: нет в обработчике"
+
+def test_trigger_query_matches_migration():
+    '''Запрос min/max должен совпадать с телом category_facets_apply'''
+    migration = next((ROOT_DIR / 'db_migrations').glob('V0018__*.sql')).read_text(encoding='utf-8')
+    assert normalize(TRIGGER_MIN_MAX_SQL.replace('%s', 'p_category')) in normalize(migration)
+
+@pytest.mark.parametrize('query', QUERIES, ids=[q['name'] for q in QUERIES])
+def test_query_plan(db, query):
+    result = explain(db, query_sql(query), query['params'])
+    plan = result['Plan']
+    nodes = plan_nodes(plan)
+
+    bad = [
+        f"{node['Node Type']} on {node.get('Relation Name', '?')}" if node['Node Type'] == 'Seq Scan' else node['Node Type']
+        for node in nodes if node['Node Type'] in FORBIDDEN_NODES
+    ]
+    assert not bad, f"{query['name']}: нет подходящего индекса ({', '.join(bad)})"
+
+    buffers = plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0)
+    assert buffers <= query['max_buffers'], f"{query['name']}: {buffers} буферов, бюджет {query['max_buffers']}"
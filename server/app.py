@@ -0,0 +1,255 @@
+"""
+Business: Single-process ASGI server hosting all backend functions for self-hosting
+Usage: python -m server.app  (from the repository root)
+       uvicorn server.app:app --workers 4
+Each backend/<name>/index.py handler is mounted under /<name>. HTTP requests are
+translated into the same event dicts the serverless platform sends, handlers run
+in a thread pool and share one Postgres pool and one S3 client per process.
+"""
+
+import asyncio
+import base64
+import importlib.util
+import os
+import threading
+import uuid
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+FUNCTIONS = ['products', 'categories', 'news', 'image-upload']
+
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', '10'))
+IMAGE_WORKER = os.environ.get('IMAGE_WORKER', '1') == '1'
+IMAGE_WORKER_POLL_INTERVAL = float(os.environ.get('IMAGE_WORKER_POLL_INTERVAL', '2'))
+
+if IMAGE_WORKER:
+    # The in-process worker drains the queue, so status requests only pick up jobs it missed
+    os.environ.setdefault('IMAGE_WORKER_ENABLED', '1')
+
+class PooledConnection:
+    """Connection proxy whose close() returns the connection to the pool"""
+
+    def __init__(self, pool: 'SharedPool', conn: Any):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+class SharedPool:
+    """
+    Thread-safe psycopg2 pool shared by all handlers of a worker process.
+    getconn() blocks instead of failing when every connection is in use.
+    """
+
+    def __init__(self, dsn: str, minconn: int, maxconn: int):
+        from psycopg2.pool import ThreadedConnectionPool
+        self._pool = ThreadedConnectionPool(minconn, maxconn, dsn)
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def connect(self) -> PooledConnection:
+        self._slots.acquire()
+        try:
+            return PooledConnection(self, self._pool.getconn())
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: Any) -> None:
+        try:
+            broken = bool(conn.closed)
+            if not broken:
+                try:
+                    # Handlers may return early without commit: drop the open transaction
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            self._pool.putconn(conn, close=broken)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        self._pool.closeall()
+
+def load_function(name: str) -> ModuleType:
+    """Import backend/<name>/index.py under a unique module name"""
+    path = BACKEND_DIR / name / 'index.py'
+    spec = importlib.util.spec_from_file_location(f"functions_{name.replace('-', '_')}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class Server:
+    def __init__(self):
+        self.functions: Dict[str, ModuleType] = {name: load_function(name) for name in FUNCTIONS}
+        self.pool: Optional[SharedPool] = None
+        self.s3: Any = None
+        self.worker_task: Optional[asyncio.Task] = None
+
+    def startup(self) -> None:
+        """Create the shared clients (once per worker process) and inject them into handlers"""
+        dsn = os.environ.get('DATABASE_URL')
+        if dsn:
+            self.pool = SharedPool(dsn, DB_POOL_MIN, DB_POOL_MAX)
+        if os.environ.get('AWS_ACCESS_KEY_ID'):
+            self.s3 = self.functions['image-upload'].get_s3_client()
+
+        for module in self.functions.values():
+            if self.pool and hasattr(module, 'get_db_connection'):
+                module.get_db_connection = self.pool.connect
+            if self.s3 and hasattr(module, 'get_s3_client'):
+                module.get_s3_client = lambda: self.s3
+
+        if IMAGE_WORKER and self.pool and self.s3:
+            self.worker_task = asyncio.get_running_loop().create_task(self.image_worker())
+
+    async def shutdown(self) -> None:
+        if self.worker_task:
+            self.worker_task.cancel()
+            try:
+                await self.worker_task
+            except asyncio.CancelledError:
+                pass
+        if self.pool:
+            self.pool.close()
+
+    async def image_worker(self) -> None:
+        """In-process replacement for backend/image-upload/worker.py"""
+        process_pending_jobs = self.functions['image-upload'].process_pending_jobs
+        while True:
+            try:
+                processed = await asyncio.to_thread(process_pending_jobs)
+            except Exception as e:
+                print(f"[server] Image worker error: {type(e).__name__}: {e}")
+                processed = 0
+            if not processed:
+                await asyncio.sleep(IMAGE_WORKER_POLL_INTERVAL)
+
+    def route(self, path: str) -> Tuple[Optional[str], str]:
+        """/image-upload/anything -> ('image-upload', '/anything')"""
+        parts = path.strip('/').split('/', 1)
+        name = parts[0]
+        if name not in self.functions:
+            return None, path
+        return name, '/' + (parts[1] if len(parts) > 1 else '')
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    self.startup()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope: Dict[str, Any], receive, send) -> None:
+        name, sub_path = self.route(scope['path'])
+        if name is None:
+            await send_response(send, {
+                'statusCode': 404,
+                'headers': {'Content-Type': 'application/json'},
+                'body': '{"error": "Function not found"}'
+            })
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        event = build_event(scope, sub_path, body)
+        context = SimpleNamespace(request_id=event['requestContext']['requestId'], function_name=name)
+        handler = self.functions[name].handler
+
+        try:
+            response = await asyncio.to_thread(handler, event, context)
+        except Exception as e:
+            print(f"[server] {name} failed: {type(e).__name__}: {e}")
+            response = {
+                'statusCode': 500,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': '{"error": "Internal server error"}'
+            }
+
+        await send_response(send, response)
+
+def build_event(scope: Dict[str, Any], path: str, body: bytes) -> Dict[str, Any]:
+    """Translate an ASGI HTTP scope into the serverless event dict"""
+    headers: Dict[str, str] = {}
+    for key, value in scope.get('headers', []):
+        headers[key.decode('latin-1').title()] = value.decode('latin-1')
+
+    query = scope.get('query_string', b'').decode('latin-1')
+    params = dict(parse_qsl(query, keep_blank_values=True))
+
+    try:
+        body_str = body.decode('utf-8')
+        is_base64_encoded = False
+    except UnicodeDecodeError:
+        body_str = base64.b64encode(body).decode('ascii')
+        is_base64_encoded = True
+
+    return {
+        'httpMethod': scope['method'],
+        'path': path,
+        'headers': headers,
+        'queryStringParameters': params,
+        'body': body_str,
+        'isBase64Encoded': is_base64_encoded,
+        'requestContext': {
+            'requestId': str(uuid.uuid4()),
+            'identity': {'sourceIp': (scope.get('client') or ('', 0))[0]}
+        }
+    }
+
+async def send_response(send, response: Dict[str, Any]) -> None:
+    """Translate the handler's response dict into ASGI messages"""
+    body = response.get('body') or ''
+    if response.get('isBase64Encoded'):
+        payload = base64.b64decode(body)
+    else:
+        payload = body.encode('utf-8') if isinstance(body, str) else bytes(body)
+
+    headers: List[Tuple[bytes, bytes]] = [
+        (str(key).lower().encode('latin-1'), str(value).encode('latin-1'))
+        for key, value in (response.get('headers') or {}).items()
+    ]
+    headers.append((b'content-length', str(len(payload)).encode('latin-1')))
+
+    await send({'type': 'http.response.start', 'status': int(response.get('statusCode', 200)), 'headers': headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+app = Server()
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(
+        'server.app:app',
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', '8000')),
+        workers=int(os.environ.get('WEB_CONCURRENCY', str(os.cpu_count() or 1)))
+    )
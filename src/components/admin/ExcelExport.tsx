@@ -0,0 +1,39 @@
+import { useState } from 'react';
+import { Button } from '@/components/ui/button';
+import Icon from '@/components/ui/icon';
+
+interface ExcelExportProps {
+  apiUrl: string;
+}
+
+const ExcelExport = ({ apiUrl }: ExcelExportProps) => {
+  const [exporting, setExporting] = useState(false);
+
+  const handleExport = async () => {
+    setExporting(true);
+    try {
+      const response = await fetch(`${apiUrl}?export=xlsx`);
+      const data = await response.json();
+
+      if (!response.ok) {
+        throw new Error(data.error || 'Ошибка экспорта');
+      }
+
+      window.open(data.url, '_blank');
+    } catch (error) {
+      console.error('Ошибка экспорта:', error);
+      alert('Не удалось выгрузить каталог. Попробуйте ещё раз.');
+    } finally {
+      setExporting(false);
+    }
+  };
+
+  return (
+    <Button variant="outline" onClick={handleExport} disabled={exporting}>
+      <Icon name="Download" className="mr-2" size={18} />
+      {exporting ? 'Экспорт...' : 'Экспорт в Excel'}
+    </Button>
+  );
+};
+
+export default ExcelExport;
@@ -55,13 +55,28 @@ const ExcelImport = ({ importingExcel, onImportStart, onImportEnd, onImportSucce
             ? String(photoValue).trim()
             : `https://archive8.ru/images/${articleStr}.jpg`;
           
-          const payload = {
+          const payload: Record<string, string | number | boolean> = {
             photo_url: photoUrl,
             article: articleStr,
             name: String(nameValue).trim(),
             price: parseFloat(priceValue) || 0
           };
 
+          // Дополнительные столбцы из экспорта каталога
+          const categoryValue = rowData['Категория'] || rowData['category'];
+          const descriptionValue = rowData['Описание'] || rowData['description'];
+          const mainImageValue = rowData['Главное фото'] || rowData['main_image'];
+          if (categoryValue) payload.category = String(categoryValue).trim();
+          if (descriptionValue) payload.description = String(descriptionValue);
+          if (mainImageValue) payload.main_image = String(mainImageValue).trim();
+
+          const visibleValue = rowData['Видимость'] ?? rowData['is_visible'];
+          if (visibleValue !== undefined && String(visibleValue).trim() !== '') {
+            payload.is_visible = !['0', 'нет', 'false'].includes(String(visibleValue).trim().toLowerCase());
+          }
+          const sortOrderValue = parseInt(String(rowData['Порядок'] ?? rowData['sort_order'] ?? ''), 10);
+          if (!Number.isNaN(sortOrderValue)) payload.sort_order = sortOrderValue;
+
           console.log('Обработка строки:', payload);
 
           if (!payload.article || !payload.name || payload.price === 0) {
@@ -71,12 +86,19 @@ const ExcelImport = ({ importingExcel, onImportStart, onImportEnd, onImportSucce
             continue;
           }
 
-          await fetch(apiUrl, {
+          const response = await fetch(apiUrl, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload)
           });
 
+          if (!response.ok) {
+            const errorData = await response.json().catch(() => ({}));
+            errorCount++;
+            errors.push(`Артикул "${payload.article}": ${errorData.error || response.status}`);
+            continue;
+          }
+
           successCount++;
         } catch (error) {
           errorCount++;
@@ -115,7 +137,7 @@ const ExcelImport = ({ importingExcel, onImportStart, onImportEnd, onImportSucce
       <input
         id="excel-upload"
         type="file"
-        accept=".xlsx,.xls"
+        accept=".xlsx,.xls,.csv"
         className="hidden"
         onChange={handleExcelImport}
       />
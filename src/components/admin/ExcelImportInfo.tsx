@@ -17,9 +17,13 @@ const ExcelImportInfo = () => {
               <li><strong>Наименование</strong> (обязательно) - название товара</li>
               <li><strong>Цена</strong> (обязательно) - цена (можно с пробелами и запятыми, например: 142 000,0)</li>
               <li><strong>Фото (URL)</strong> или <strong>Фото</strong> (опционально) - ссылка на изображение</li>
+              <li><strong>Категория</strong>, <strong>Описание</strong>, <strong>Главное фото</strong> (опционально) - как в файле экспорта</li>
+              <li><strong>Видимость</strong> (опционально) - 1 или 0 (да/нет), <strong>Порядок</strong> (опционально) - число</li>
             </ul>
             <p className="text-sm text-muted-foreground mt-2">
-              💡 Цены автоматически очищаются от пробелов, запятые заменяются на точки
+              💡 Цены автоматически очищаются от пробелов, запятые заменяются на точки.
+              Файл, выгруженный кнопкой «Экспорт в Excel», подходит для импорта: переносятся все столбцы,
+              включая видимость и порядок. Товары с уже существующим артикулом пропускаются.
             </p>
           </div>
         </div>
@@ -7,6 +7,35 @@ import Icon from '@/components/ui/icon';
 import { toast } from 'sonner';
 
 const IMAGE_UPLOAD_URL = 'https://functions.poehali.dev/f26b6393-1447-4b1c-a653-339f6c61fd54';
+// Файлы крупнее этого размера обрабатываются асинхронно, остальные — сразу в запросе
+const ASYNC_UPLOAD_MIN_SIZE = 2 * 1024 * 1024;
+const JOB_POLL_INTERVAL = 1000;
+// С запасом на повторные попытки зависших задач на сервере
+const JOB_POLL_TIMEOUT = 300000;
+
+const waitForJob = async (jobId: string): Promise<string> => {
+  const startedAt = Date.now();
+
+  while (Date.now() - startedAt < JOB_POLL_TIMEOUT) {
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+
+    const response = await fetch(`${IMAGE_UPLOAD_URL}?job_id=${jobId}`);
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.error || 'Ошибка проверки статуса обработки');
+    }
+
+    const job = await response.json();
+    if (job.status === 'done') {
+      return job.result.url;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Ошибка обработки изображения');
+    }
+  }
+
+  throw new Error('Истекло время ожидания обработки изображения');
+};
 
 interface ImageUploaderProps {
   value: string;
@@ -53,7 +82,8 @@ export default function ImageUploader({ value, onChange, label = 'Изображ
         body: JSON.stringify({
           file: base64Data,
           filename: file.name,
-          contentType: file.type
+          contentType: file.type,
+          async: file.size > ASYNC_UPLOAD_MIN_SIZE
         })
       });
 
@@ -63,7 +93,7 @@ export default function ImageUploader({ value, onChange, label = 'Изображ
       }
 
       const result = await response.json();
-      const imageUrl = result.url;
+      const imageUrl = result.job_id ? await waitForJob(result.job_id) : result.url;
 
       onChange(imageUrl);
       toast.success('Изображение успешно загружено на CDN');
@@ -25,6 +25,7 @@ interface Category {
   id: string;
   name: string;
   icon: string;
+  product_count?: number;
 }
 
 interface CatalogSectionProps {
@@ -137,6 +138,11 @@ const CatalogSection = ({
                   }`}>
                     {category.name}
                   </span>
+                  {category.product_count !== undefined && (
+                    <span className="text-xs text-white/80">
+                      {category.product_count}
+                    </span>
+                  )}
                 </div>
               </button>
             );
@@ -6,6 +6,7 @@ import LoginForm from '@/components/admin/LoginForm';
 import ProductForm from '@/components/admin/ProductForm';
 import ProductTable from '@/components/admin/ProductTable';
 import ExcelImport from '@/components/admin/ExcelImport';
+import ExcelExport from '@/components/admin/ExcelExport';
 import ExcelImportInfo from '@/components/admin/ExcelImportInfo';
 import CategoryManager from '@/components/admin/CategoryManager';
 import NewsManager from '@/components/admin/NewsManager';
@@ -290,6 +291,7 @@ const Admin = () => {
               onImportSuccess={loadProducts}
               apiUrl={API_URL}
             />
+            <ExcelExport apiUrl={API_URL} />
             <Button variant="outline" onClick={handleLogout}>
               <Icon name="LogOut" className="mr-2" size={18} />
               Выйти
@@ -26,6 +26,7 @@ interface Category {
   id: string;
   name: string;
   icon: string;
+  product_count?: number;
 }
 
 const API_URL = 'https://functions.poehali.dev/60f2060b-ddaf-4a36-adc7-ab19b94dcbf2';
@@ -60,7 +61,7 @@ const Index = () => {
 
   const loadCategories = async () => {
     try {
-      const response = await fetch(CATEGORIES_API_URL);
+      const response = await fetch(`${CATEGORIES_API_URL}?facets=true`);
       if (!response.ok) {
         throw new Error('Ошибка загрузки категорий');
       }